@@ -26,10 +26,19 @@ Options:
 import argparse
 import random
 import json
-import svgwrite
-import requests
 from math import ceil
 import colorsys
+import os
+import time
+import numpy as np
+from functools import lru_cache
+from pathlib import Path
+from urllib.request import urlopen
+from xml.sax.saxutils import escape
+
+PALETTE_URL = "https://unpkg.com/nice-color-palettes@3.0.0/100.json"
+PALETTE_CACHE = Path.home() / ".cache" / "svg_artgrid" / "100.json"
+PALETTE_CACHE_MAX_AGE = 30 * 24 * 60 * 60  # 30 days, in seconds
 
 def parse_args():
     """Parse command line arguments."""
@@ -49,24 +58,50 @@ def parse_args():
     
     return parser.parse_args()
 
+@lru_cache(maxsize=None)
 def load_color_palettes(palette_file):
-    """Load color palettes from a file or URL."""
+    """Load color palettes from a file or URL, caching downloads on disk.
+    
+    Results are memoized per palette file, so callers must not mutate them.
+    """
     if palette_file:
         with open(palette_file, 'r') as f:
             return json.load(f)
-    else:
-        response = requests.get("https://unpkg.com/nice-color-palettes@3.0.0/100.json")
-        return response.json()
-
-def create_background_colors(color_palette):
-    """Create background colors by mixing colors from the palette."""
-    # Mix the first two colors of the palette
-    color1 = color_palette[0].lstrip('#')
-    color2 = color_palette[1].lstrip('#')
     
+    # Reuse a recent download instead of fetching the palettes on every run
+    if PALETTE_CACHE.exists() and time.time() - PALETTE_CACHE.stat().st_mtime < PALETTE_CACHE_MAX_AGE:
+        try:
+            return json.loads(PALETTE_CACHE.read_text())
+        except (OSError, ValueError):
+            pass  # Unreadable or corrupt cache, download the palettes again
+    
+    with urlopen(PALETTE_URL, timeout=10) as response:
+        data = response.read()
+    palettes = json.loads(data)
+    
+    # Caching is best effort; a read-only home directory shouldn't stop a run.
+    # Write to a temporary file first so an interrupted write can't leave a truncated cache.
+    tmp_cache = PALETTE_CACHE.with_name(f"{PALETTE_CACHE.name}.{os.getpid()}.tmp")
+    try:
+        PALETTE_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_cache.write_bytes(data)
+        os.replace(tmp_cache, PALETTE_CACHE)
+    except OSError:
+        tmp_cache.unlink(missing_ok=True)
+    
+    return palettes
+
+@lru_cache(maxsize=4096)
+def _rgb_hex(r, g, b):
+    """Format integer RGB channels as a hex color string."""
+    return '#' + bytes((r, g, b)).hex()
+
+@lru_cache(maxsize=None)
+def _mix_background_colors(color1, color2):
+    """Mix two hex colors into (lighter, darker) desaturated hex colors."""
     # Convert hex to RGB
-    r1, g1, b1 = tuple(int(color1[i:i+2], 16) for i in (0, 2, 4))
-    r2, g2, b2 = tuple(int(color2[i:i+2], 16) for i in (0, 2, 4))
+    r1, g1, b1 = bytes.fromhex(color1.lstrip('#'))
+    r2, g2, b2 = bytes.fromhex(color2.lstrip('#'))
     
     # Mix colors (50% blend)
     r = (r1 + r2) // 2
@@ -79,372 +114,498 @@ def create_background_colors(color_palette):
     r, g, b = colorsys.hls_to_rgb(h, l, s)
     r, g, b = int(r*255), int(g*255), int(b*255)
     
-    # Create hex color
-    bg = f"#{r:02x}{g:02x}{b:02x}"
-    
-    # Create lighter and darker versions
+    # Re-derive HSL from the truncated color for the lighter and darker versions
     h, l, s = colorsys.rgb_to_hls(r/255, g/255, b/255)
     
     # Lighter (increase lightness)
-    l_light = min(1, l + 0.1)
-    r_light, g_light, b_light = colorsys.hls_to_rgb(h, l_light, s)
-    r_light, g_light, b_light = int(r_light*255), int(g_light*255), int(b_light*255)
-    bg_inner = f"#{r_light:02x}{g_light:02x}{b_light:02x}"
+    r_light, g_light, b_light = colorsys.hls_to_rgb(h, min(1, l + 0.1), s)
+    bg_inner = _rgb_hex(int(r_light*255), int(g_light*255), int(b_light*255))
     
     # Darker (decrease lightness)
-    l_dark = max(0, l - 0.1)
-    r_dark, g_dark, b_dark = colorsys.hls_to_rgb(h, l_dark, s)
-    r_dark, g_dark, b_dark = int(r_dark*255), int(g_dark*255), int(b_dark*255)
-    bg_outer = f"#{r_dark:02x}{g_dark:02x}{b_dark:02x}"
+    r_dark, g_dark, b_dark = colorsys.hls_to_rgb(h, max(0, l - 0.1), s)
+    bg_outer = _rgb_hex(int(r_dark*255), int(g_dark*255), int(b_dark*255))
+    
+    return bg_inner, bg_outer
+
+def create_background_colors(color_palette):
+    """Create background colors by mixing colors from the palette."""
+    # Mix the first two colors of the palette (a single-color palette mixes with itself)
+    bg_inner, bg_outer = _mix_background_colors(color_palette[0], color_palette[min(1, len(color_palette) - 1)])
     
     return {"bg_inner": bg_inner, "bg_outer": bg_outer}
 
-def get_two_colors(color_palette):
-    """Get two different colors from the palette."""
-    color_list = color_palette.copy()
-    # Get random index for this array of colors
-    color_index = random.randint(0, len(color_list) - 1)
-    # Set the background to the color at that array
-    background = color_list[color_index]
-    # Remove that color from the options
-    color_list.pop(color_index)
-    # Set the foreground to any other color in the array
-    foreground = random.choice(color_list)
+def get_two_colors(color_palette, rand=random):
+    """Get two different colors from the palette, drawn with `rand` (default: the random module)."""
+    # A single-color palette can only reuse its color
+    if len(color_palette) < 2:
+        return {"foreground": color_palette[0], "background": color_palette[0]}
+    
+    background, foreground = rand.sample(color_palette, 2)
     
     return {"foreground": foreground, "background": background}
 
-def draw_circle(dwg, x, y, square_size, foreground, background):
+# Block styles are drawn once as symbols on a SYMBOL_SIZE square and placed in
+# each cell with <use>, which also supplies the cell's colors: shapes filled
+# with FOREGROUND take the use's color, shapes with no fill inherit its fill
+SYMBOL_SIZE = 100
+FOREGROUND = "currentColor"
+BACKGROUND = None
+
+_INV_SQRT2 = 0.7071067811865476  # 1 / sqrt(2)
+
+class SVGBuffer:
+    """Collect SVG markup as string fragments and write it out in one go.
+    
+    Symbol placements are batched by color pair and written out as one
+    <g fill color> group per pair the next time the buffer is flushed.
+    """
+    
+    def __init__(self, filename, width, height, shape_rendering=None):
+        self.filename = filename
+        self.width = width
+        self.height = height
+        self.shape_rendering = shape_rendering
+        self.defs = []
+        self.symbols = {}
+        self.parts = []
+        self.uses = {}
+    
+    def radial_gradient(self, id, stops):
+        """Add a radial gradient built from (offset, color) stops to the defs."""
+        stop_tags = ''.join(f'<stop offset="{offset}" stop-color="{color}"/>' for offset, color in stops)
+        self.defs.append(f'<radialGradient id="{id}">{stop_tags}</radialGradient>')
+    
+    def symbol(self, id, class_):
+        """Define a block symbol with a background square and return a buffer to draw its shapes into."""
+        symbol = SVGBuffer(None, SYMBOL_SIZE, SYMBOL_SIZE)
+        symbol.parts.append(f'<symbol id="{id}" class="{class_}" viewBox="0 0 {SYMBOL_SIZE} {SYMBOL_SIZE}">')
+        symbol.rect(0, 0, SYMBOL_SIZE, SYMBOL_SIZE, fill=BACKGROUND)
+        self.symbols[id] = symbol
+        return symbol
+    
+    def use(self, id, x, y, size, foreground, background):
+        """Place a block symbol in a square with the given colors."""
+        self.uses.setdefault((background, foreground), []).append(
+            f'<use xlink:href="#{id}" x="{x}" y="{y}" width="{size}" height="{size}"/>')
+    
+    def flush(self):
+        """Write out the pending symbol placements, one group per color pair."""
+        for (background, foreground), uses in self.uses.items():
+            self.parts.append(f'<g fill="{background}" color="{foreground}">')
+            self.parts.extend(uses)
+            self.parts.append('</g>')
+        self.uses = {}
+    
+    def rect(self, x, y, width, height, fill):
+        """Add a rectangle."""
+        self.parts.append(f'<rect x="{_fmt(x)}" y="{_fmt(y)}" width="{_fmt(width)}" height="{_fmt(height)}"'
+                          f'{_fill_attr(fill)}/>')
+    
+    def circle(self, cx, cy, r, fill):
+        """Add a circle."""
+        self.parts.append(f'<circle cx="{_fmt(cx)}" cy="{_fmt(cy)}" r="{_fmt(r)}"{_fill_attr(fill)}/>')
+    
+    def polygon(self, points, fill):
+        """Add a polygon from a list of (x, y) points."""
+        points = ' '.join(f'{_fmt(px)},{_fmt(py)}' for px, py in points)
+        self.parts.append(f'<polygon points="{points}"{_fill_attr(fill)}/>')
+    
+    def path(self, d, fill):
+        """Add a path from its path data string."""
+        self.parts.append(f'<path d="{d}"{_fill_attr(fill)}/>')
+    
+    def text(self, content, x, y, font_size, fill, font_family="monospace", font_weight="bold", text_anchor="middle"):
+        """Add a text element."""
+        self.parts.append(f'<text x="{_fmt(x)}" y="{_fmt(y)}" font-family="{font_family}" font-size="{_fmt(font_size)}" '
+                          f'font-weight="{font_weight}" text-anchor="{text_anchor}"{_fill_attr(fill)}>{escape(content)}</text>')
+    
+    def fragments(self):
+        """Yield the whole SVG document as a sequence of string fragments."""
+        self.flush()
+        yield '<?xml version="1.0" encoding="utf-8" ?>\n'
+        # Presentation attributes on the root are inherited without any CSS selector matching
+        shape_rendering = f' shape-rendering="{self.shape_rendering}"' if self.shape_rendering else ''
+        yield (f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" version="1.1" '
+               f'width="{self.width}px" height="{self.height}px"'
+               f'{shape_rendering}>')
+        yield '<defs>'
+        yield from self.defs
+        for symbol in self.symbols.values():
+            yield from symbol.parts
+            yield '</symbol>'
+        yield '</defs>'
+        yield from self.parts
+        yield '</svg>'
+    
+    def render(self):
+        """Render the whole SVG document as a single string."""
+        return ''.join(self.fragments())
+    
+    def save(self):
+        """
+        Write the SVG document to its output file through a large write buffer.
+        
+        The fragments are written as they are yielded, so the document is never
+        joined into one string. The fragments themselves are all held until
+        now, because a <g> color group can't be written until the whole grid
+        is known.
+        """
+        with open(self.filename, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            f.writelines(self.fragments())
+
+def _fmt(value):
+    """Format a coordinate with at most two decimals."""
+    return f"{value:.2f}".rstrip('0').rstrip('.')
+
+def _fill_attr(fill):
+    """Format a fill attribute, leaving it out so the fill is inherited when None."""
+    return f' fill="{fill}"' if fill is not None else ''
+
+def draw_circle(svg, x, y, square_size, foreground, background, variant):
     """Draw a circle block."""
-    # Create group
-    group = dwg.g(class_="draw-circle")
-    
-    # Draw background
-    group.add(dwg.rect((x, y), (square_size, square_size), fill=background))
-    
-    # Draw foreground circle
-    group.add(dwg.circle(center=(x + square_size/2, y + square_size/2), 
-                         r=square_size/2, fill=foreground))
-    
     # Add variation: sometimes add an inner circle
-    if random.random() < 0.3:
-        group.add(dwg.circle(center=(x + square_size/2, y + square_size/2),
-                             r=square_size/4, fill=background))
+    has_inner_circle = variant < 0.3
+    symbol_id = "circle-inner" if has_inner_circle else "circle"
+    
+    if symbol_id not in svg.symbols:
+        symbol = svg.symbol(symbol_id, "draw-circle")
+        size = SYMBOL_SIZE
+        
+        # Draw foreground circle
+        symbol.circle(size/2, size/2, size/2, fill=FOREGROUND)
+        
+        if has_inner_circle:
+            symbol.circle(size/2, size/2, size/4, fill=BACKGROUND)
     
-    dwg.add(group)
+    svg.use(symbol_id, x, y, square_size, foreground, background)
 
-def draw_opposite_circles(dwg, x, y, square_size, foreground, background):
+def draw_opposite_circles(svg, x, y, square_size, foreground, background, variant):
     """Draw opposite circles block."""
-    group = dwg.g(class_="opposite-circles")
-    circle_group = dwg.g()
-    
-    # Draw background
-    group.add(dwg.rect((x, y), (square_size, square_size), fill=background))
-    
-    # Create mask
-    mask_id = f"mask-{x}-{y}"
-    mask = dwg.mask(id=mask_id)
-    mask.add(dwg.rect((x, y), (square_size, square_size), fill="white"))
-    dwg.defs.add(mask)
-    
     # Choose one of these options for circle positions
-    options = [
-        # top left + bottom right
-        [0, 0, square_size, square_size],
-        # top right + bottom left
-        [square_size, 0, 0, square_size]
-    ]
-    offset = random.choice(options)
-    
-    # Draw circles
-    circle1 = dwg.circle(center=(x + offset[0], y + offset[1]), 
-                        r=square_size/2, fill=foreground)
-    circle2 = dwg.circle(center=(x + offset[2], y + offset[3]), 
-                        r=square_size/2, fill=foreground)
-    
-    circle_group.add(circle1)
-    circle_group.add(circle2)
-    
-    # Apply mask to circle group
-    circle_group['mask'] = f"url(#{mask_id})"
-    
-    group.add(circle_group)
-    dwg.add(group)
-
-def draw_cross(dwg, x, y, square_size, foreground, background):
-    """Draw a cross or X block."""
-    group = dwg.g(class_="draw-cross")
-    
-    # Draw background
-    group.add(dwg.rect((x, y), (square_size, square_size), fill=background))
+    is_top_left = variant < 0.5
+    symbol_id = "opposite-circles-tl" if is_top_left else "opposite-circles-tr"
     
-    # Determine if it's a + or ×
-    is_plus = random.random() < 0.5
-    
-    if is_plus:
-        # Horizontal line
-        group.add(dwg.rect(
-            (x, y + square_size/3),
-            (square_size, square_size/3),
-            fill=foreground
-        ))
-        
-        # Vertical line
-        group.add(dwg.rect(
-            (x + square_size/3, y),
-            (square_size/3, square_size),
-            fill=foreground
-        ))
-    else:
-        # For the X, we use a polygon with two triangles
-        # First diagonal line (top-left to bottom-right)
-        width = square_size / 6  # Width of the line
-        
-        # Calculate points for diagonal line
-        x1, y1 = x, y
-        x2, y2 = x + square_size, y + square_size
-        
-        # Calculate points for the polygon (a thick line)
-        dx = x2 - x1
-        dy = y2 - y1
-        length = (dx**2 + dy**2)**0.5
-        
-        # Normalize and rotate to get perpendicular vector
-        nx, ny = -dy/length, dx/length
+    if symbol_id not in svg.symbols:
+        symbol = svg.symbol(symbol_id, "opposite-circles")
+        size = SYMBOL_SIZE
         
-        # Calculate corners of the polygon
-        p1 = (x1 + nx*width/2, y1 + ny*width/2)
-        p2 = (x2 + nx*width/2, y2 + ny*width/2)
-        p3 = (x2 - nx*width/2, y2 - ny*width/2)
-        p4 = (x1 - nx*width/2, y1 - ny*width/2)
+        # Each circle is centered on a corner, so only the quarter inside the
+        # square is visible; draw those quarters directly instead of masking
+        radius = size / 2
+        r, far = _fmt(radius), _fmt(size - radius)
         
-        group.add(dwg.polygon([p1, p2, p3, p4], fill=foreground))
+        if is_top_left:
+            # top left + bottom right
+            d = (f"M 0 0 L {r} 0 A {r} {r} 0 0 1 0 {r} Z "
+                 f"M {size} {size} L {far} {size} A {r} {r} 0 0 1 {size} {far} Z")
+        else:
+            # top right + bottom left
+            d = (f"M {size} 0 L {size} {r} A {r} {r} 0 0 1 {far} 0 Z "
+                 f"M 0 {size} L 0 {far} A {r} {r} 0 0 1 {r} {size} Z")
         
-        # Second diagonal line (top-right to bottom-left)
-        x1, y1 = x + square_size, y
-        x2, y2 = x, y + square_size
-        
-        # Calculate points for the polygon (a thick line)
-        dx = x2 - x1
-        dy = y2 - y1
-        length = (dx**2 + dy**2)**0.5
-        
-        # Normalize and rotate to get perpendicular vector
-        nx, ny = -dy/length, dx/length
-        
-        # Calculate corners of the polygon
-        p1 = (x1 + nx*width/2, y1 + ny*width/2)
-        p2 = (x2 + nx*width/2, y2 + ny*width/2)
-        p3 = (x2 - nx*width/2, y2 - ny*width/2)
-        p4 = (x1 - nx*width/2, y1 - ny*width/2)
-        
-        group.add(dwg.polygon([p1, p2, p3, p4], fill=foreground))
+        symbol.path(d, fill=FOREGROUND)
     
-    dwg.add(group)
+    svg.use(symbol_id, x, y, square_size, foreground, background)
 
-def draw_half_square(dwg, x, y, square_size, foreground, background):
-    """Draw a half square block."""
-    group = dwg.g(class_="draw-half-square")
+def draw_cross(svg, x, y, square_size, foreground, background, variant):
+    """Draw a cross or X block."""
+    # Determine if it's a + or ×
+    is_plus = variant < 0.5
+    symbol_id = "cross-plus" if is_plus else "cross-x"
     
-    # Draw background
-    group.add(dwg.rect((x, y), (square_size, square_size), fill=background))
+    if symbol_id not in svg.symbols:
+        symbol = svg.symbol(symbol_id, "draw-cross")
+        size = SYMBOL_SIZE
+        
+        if is_plus:
+            # Horizontal line
+            symbol.rect(0, size/3, size, size/3, fill=FOREGROUND)
+            
+            # Vertical line
+            symbol.rect(size/3, 0, size/3, size, fill=FOREGROUND)
+        else:
+            # For the X, we use two thick diagonal lines as polygons
+            width = size / 6  # Width of the line
+            
+            # Both diagonals run at 45 degrees, so their unit normals are
+            # (±1/√2, ±1/√2) and each corner is offset by the same amount
+            offset = _INV_SQRT2 * width/2
+            
+            # First diagonal line (top-left to bottom-right)
+            symbol.polygon([(-offset, offset), (size - offset, size + offset),
+                            (size + offset, size - offset), (offset, -offset)], fill=FOREGROUND)
+            
+            # Second diagonal line (top-right to bottom-left)
+            symbol.polygon([(size - offset, -offset), (-offset, size - offset),
+                            (offset, size + offset), (size + offset, offset)], fill=FOREGROUND)
     
+    svg.use(symbol_id, x, y, square_size, foreground, background)
+
+# (symbol id, polygon points) for each half a half square block can fill
+_HALF_SQUARES = (
+    ("half-square-top", [(0, 0), (SYMBOL_SIZE, 0), (SYMBOL_SIZE, SYMBOL_SIZE/2), (0, SYMBOL_SIZE/2)]),
+    ("half-square-right", [(SYMBOL_SIZE/2, 0), (SYMBOL_SIZE, 0), (SYMBOL_SIZE, SYMBOL_SIZE), (SYMBOL_SIZE/2, SYMBOL_SIZE)]),
+    ("half-square-bottom", [(0, SYMBOL_SIZE/2), (SYMBOL_SIZE, SYMBOL_SIZE/2), (SYMBOL_SIZE, SYMBOL_SIZE), (0, SYMBOL_SIZE)]),
+    ("half-square-left", [(0, 0), (SYMBOL_SIZE/2, 0), (SYMBOL_SIZE/2, SYMBOL_SIZE), (0, SYMBOL_SIZE)]),
+)
+
+def draw_half_square(svg, x, y, square_size, foreground, background, variant):
+    """Draw a half square block."""
     # Determine which half to fill
-    direction = random.choice(['top', 'right', 'bottom', 'left'])
-    
-    if direction == 'top':
-        points = [(x, y), (x + square_size, y), (x + square_size, y + square_size/2), (x, y + square_size/2)]
-    elif direction == 'right':
-        points = [(x + square_size/2, y), (x + square_size, y), (x + square_size, y + square_size), (x + square_size/2, y + square_size)]
-    elif direction == 'bottom':
-        points = [(x, y + square_size/2), (x + square_size, y + square_size/2), (x + square_size, y + square_size), (x, y + square_size)]
-    else:  # left
-        points = [(x, y), (x + square_size/2, y), (x + square_size/2, y + square_size), (x, y + square_size)]
+    symbol_id, points = _HALF_SQUARES[int(variant * len(_HALF_SQUARES))]
     
-    group.add(dwg.polygon(points, fill=foreground))
+    if symbol_id not in svg.symbols:
+        symbol = svg.symbol(symbol_id, "draw-half-square")
+        symbol.polygon(points, fill=FOREGROUND)
     
-    dwg.add(group)
+    svg.use(symbol_id, x, y, square_size, foreground, background)
 
-def draw_diagonal_square(dwg, x, y, square_size, foreground, background):
+# (symbol id, triangle points) for each diagonal a diagonal square block can fill
+_DIAGONAL_SQUARES = (
+    ("diagonal-square-tl", [(0, 0), (SYMBOL_SIZE, SYMBOL_SIZE), (0, SYMBOL_SIZE)]),
+    ("diagonal-square-tr", [(SYMBOL_SIZE, 0), (SYMBOL_SIZE, SYMBOL_SIZE), (0, 0)]),
+)
+
+def draw_diagonal_square(svg, x, y, square_size, foreground, background, variant):
     """Draw a diagonal square block."""
-    group = dwg.g(class_="draw-diagonal-square")
-    
-    # Draw background
-    group.add(dwg.rect((x, y), (square_size, square_size), fill=background))
-    
     # Determine which diagonal to fill
-    is_top_left_to_bottom_right = random.random() < 0.5
-    
-    if is_top_left_to_bottom_right:
-        points = [(x, y), (x + square_size, y + square_size), (x, y + square_size)]
-    else:
-        points = [(x + square_size, y), (x + square_size, y + square_size), (x, y)]
+    symbol_id, points = _DIAGONAL_SQUARES[int(variant * len(_DIAGONAL_SQUARES))]
     
-    group.add(dwg.polygon(points, fill=foreground))
+    if symbol_id not in svg.symbols:
+        symbol = svg.symbol(symbol_id, "draw-diagonal-square")
+        symbol.polygon(points, fill=FOREGROUND)
     
-    dwg.add(group)
+    svg.use(symbol_id, x, y, square_size, foreground, background)
 
-def draw_quarter_circle(dwg, x, y, square_size, foreground, background):
+# (symbol id, path data) for each corner a quarter circle block can sit in
+_QUARTER_CIRCLES = (
+    ("quarter-circle-top-left", f"M 0 0 A {SYMBOL_SIZE} {SYMBOL_SIZE} 0 0 1 {SYMBOL_SIZE} 0 L 0 0"),
+    ("quarter-circle-top-right",
+     f"M {SYMBOL_SIZE} 0 A {SYMBOL_SIZE} {SYMBOL_SIZE} 0 0 1 {SYMBOL_SIZE} {SYMBOL_SIZE} L {SYMBOL_SIZE} 0"),
+    ("quarter-circle-bottom-right",
+     f"M {SYMBOL_SIZE} {SYMBOL_SIZE} A {SYMBOL_SIZE} {SYMBOL_SIZE} 0 0 1 0 {SYMBOL_SIZE} L {SYMBOL_SIZE} {SYMBOL_SIZE}"),
+    ("quarter-circle-bottom-left", f"M 0 {SYMBOL_SIZE} A {SYMBOL_SIZE} {SYMBOL_SIZE} 0 0 1 0 0 L 0 {SYMBOL_SIZE}"),
+)
+
+def draw_quarter_circle(svg, x, y, square_size, foreground, background, variant):
     """Draw a quarter circle block."""
-    group = dwg.g(class_="draw-quarter-circle")
-    
-    # Draw background
-    group.add(dwg.rect((x, y), (square_size, square_size), fill=background))
-    
     # Determine which corner to place the quarter circle
-    corner = random.choice(['top-left', 'top-right', 'bottom-right', 'bottom-left'])
-    
-    # Create a path for the quarter circle
-    path = dwg.path(fill=foreground)
-    
-    if corner == 'top-left':
-        path.push(f"M {x} {y}")
-        path.push(f"A {square_size} {square_size} 0 0 1 {x + square_size} {y}")
-        path.push(f"L {x} {y}")
-    elif corner == 'top-right':
-        path.push(f"M {x + square_size} {y}")
-        path.push(f"A {square_size} {square_size} 0 0 1 {x + square_size} {y + square_size}")
-        path.push(f"L {x + square_size} {y}")
-    elif corner == 'bottom-right':
-        path.push(f"M {x + square_size} {y + square_size}")
-        path.push(f"A {square_size} {square_size} 0 0 1 {x} {y + square_size}")
-        path.push(f"L {x + square_size} {y + square_size}")
-    else:  # bottom-left
-        path.push(f"M {x} {y + square_size}")
-        path.push(f"A {square_size} {square_size} 0 0 1 {x} {y}")
-        path.push(f"L {x} {y + square_size}")
-    
-    group.add(path)
-    
-    dwg.add(group)
-
-def draw_dots(dwg, x, y, square_size, foreground, background):
-    """Draw a dots block."""
-    group = dwg.g(class_="draw-dots")
+    symbol_id, d = _QUARTER_CIRCLES[int(variant * len(_QUARTER_CIRCLES))]
     
-    # Draw background
-    group.add(dwg.rect((x, y), (square_size, square_size), fill=background))
+    if symbol_id not in svg.symbols:
+        symbol = svg.symbol(symbol_id, "draw-quarter-circle")
+        symbol.path(d, fill=FOREGROUND)
     
+    svg.use(symbol_id, x, y, square_size, foreground, background)
+
+# Compound path data for all dots of a dots block in symbol space, keyed by dot count
+_DOT_PATHS = {}
+
+def _dot_path(num_dots):
+    """Get the path data for a dots block, computing it on first use."""
+    d = _DOT_PATHS.get(num_dots)
+    if d is None:
+        if num_dots == 4:
+            rows, cols = 2, 2
+        elif num_dots == 9:
+            rows, cols = 3, 3
+        else:  # 16
+            rows, cols = 4, 4
+        
+        cell_size = SYMBOL_SIZE / rows
+        r = _fmt(cell_size * 0.3)
+        
+        # Each dot is two half-circle arcs starting from its leftmost point
+        ii, jj = np.mgrid[0:rows, 0:cols]
+        left_x = (ii.ravel() + 0.5) * cell_size - cell_size * 0.3
+        center_y = (jj.ravel() + 0.5) * cell_size
+        d = ' '.join(f"M {_fmt(dot_x)} {_fmt(dot_y)} a {r} {r} 0 1 0 {_fmt(cell_size * 0.6)} 0 "
+                     f"a {r} {r} 0 1 0 -{_fmt(cell_size * 0.6)} 0 Z"
+                     for dot_x, dot_y in zip(left_x.tolist(), center_y.tolist()))
+        _DOT_PATHS[num_dots] = d
+    return d
+
+def draw_dots(svg, x, y, square_size, foreground, background, variant):
+    """Draw a dots block."""
     # Determine number of dots (4, 9, or 16)
-    num_dots = random.choice([4, 9, 16])
-    
-    if num_dots == 4:
-        rows, cols = 2, 2
-    elif num_dots == 9:
-        rows, cols = 3, 3
-    else:  # 16
-        rows, cols = 4, 4
-    
-    cell_size = square_size / rows
-    dot_radius = cell_size * 0.3
-    
-    for i in range(rows):
-        for j in range(cols):
-            center_x = x + (i + 0.5) * cell_size
-            center_y = y + (j + 0.5) * cell_size
-            
-            group.add(dwg.circle(center=(center_x, center_y), r=dot_radius, fill=foreground))
+    dot_counts = [4, 9, 16]
+    num_dots = dot_counts[int(variant * len(dot_counts))]
+    symbol_id = f"dots-{num_dots}"
     
-    dwg.add(group)
+    if symbol_id not in svg.symbols:
+        symbol = svg.symbol(symbol_id, "draw-dots")
+        
+        # All dots in a single compound path
+        symbol.path(_dot_path(num_dots), fill=FOREGROUND)
+    
+    svg.use(symbol_id, x, y, square_size, foreground, background)
+
+# Characters for letter blocks, a limited set that looks good in a monospace font
+_LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789+-*/=#@&%$'
 
-def draw_letter_block(dwg, x, y, square_size, foreground, background):
+def draw_letter_block(svg, x, y, square_size, foreground, background, variant):
     """Draw a letter block."""
-    group = dwg.g(class_="draw-letter-block")
-    
-    # Draw background
-    group.add(dwg.rect((x, y), (square_size, square_size), fill=background))
-    
     # Select a random character
-    # Using a limited set that would look good in a monospace font
-    characters = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 
-                 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z',
-                 '0', '1', '2', '3', '4', '5', '6', '7', '8', '9',
-                 '+', '-', '*', '/', '=', '#', '@', '&', '%', '$']
-    
-    character = random.choice(characters)
+    character = _LETTERS[int(variant * len(_LETTERS))]
+    # Symbols like '#' aren't valid in ids, so key the symbol on the code point
+    symbol_id = f"letter-block-{ord(character)}"
     
-    # Add text element
-    text = dwg.text(character, insert=(x + square_size/2, y + square_size/2 + square_size*0.3), 
-                    font_family="monospace", font_size=square_size*0.8, 
-                    font_weight="bold", fill=foreground,
-                    text_anchor="middle")
-    
-    group.add(text)
+    if symbol_id not in svg.symbols:
+        symbol = svg.symbol(symbol_id, "draw-letter-block")
+        size = SYMBOL_SIZE
+        
+        # Add text element
+        symbol.text(character, size/2, size/2 + size*0.3, font_size=size*0.8, fill=FOREGROUND)
     
-    dwg.add(group)
+    svg.use(symbol_id, x, y, square_size, foreground, background)
 
-def generate_little_block(dwg, i, j, square_size, color_palette, block_styles):
+# Map block style names to their drawing functions
+# Each drawing function picks its variation from a uniform `variant` in [0, 1)
+STYLE_MAP = {
+    'circle': draw_circle,
+    'opposite_circles': draw_opposite_circles,
+    'cross': draw_cross,
+    'half_square': draw_half_square,
+    'diagonal_square': draw_diagonal_square,
+    'quarter_circle': draw_quarter_circle,
+    'dots': draw_dots,
+    'letter_block': draw_letter_block
+}
+
+def resolve_style_funcs(block_styles, exclude=()):
+    """Resolve style names to drawing functions, falling back to all styles."""
+    style_funcs = tuple(STYLE_MAP[style] for style in block_styles
+                        if style in STYLE_MAP and style not in exclude)
+    if not style_funcs:
+        style_funcs = tuple(func for style, func in STYLE_MAP.items() if style not in exclude)
+    return style_funcs
+
+def generate_little_block(svg, i, j, square_size, style_func, foreground, background, variant):
     """Generate a single block in the grid."""
-    colors = get_two_colors(color_palette)
-    
-    # Convert block_styles to function map if they are strings
-    style_map = {
-        'circle': draw_circle,
-        'opposite_circles': draw_opposite_circles,
-        'cross': draw_cross,
-        'half_square': draw_half_square,
-        'diagonal_square': draw_diagonal_square,
-        'quarter_circle': draw_quarter_circle,
-        'dots': draw_dots,
-        'letter_block': draw_letter_block
-    }
-    
-    # Filter available styles based on user selection
-    available_styles = [style for style in block_styles if style in style_map]
-    if not available_styles:
-        available_styles = list(style_map.keys())
-    
-    # Select a random style
-    style_name = random.choice(available_styles)
-    style_func = style_map[style_name]
-    
     x_pos = i * square_size
     y_pos = j * square_size
     
     # Call the appropriate drawing function
-    style_func(dwg, x_pos, y_pos, square_size, colors["foreground"], colors["background"])
+    style_func(svg, x_pos, y_pos, square_size, foreground, background, variant)
 
-def generate_grid(dwg, num_rows, num_cols, square_size, color_palette, block_styles):
+def generate_grid(svg, rng, num_rows, num_cols, square_size, color_palette, block_styles):
     """Generate the grid of blocks."""
+    style_funcs = resolve_style_funcs(block_styles)
+    
+    # Draw every random decision for the grid up front
+    shape = (num_rows, num_cols)
+    style_idx = rng.integers(0, len(style_funcs), size=shape).tolist()
+    background_idx = rng.integers(0, len(color_palette), size=shape)
+    # Offset the foreground from the background so the two colors always differ
+    # (a single-color palette has to reuse its color for both)
+    offsets = rng.integers(1, max(len(color_palette), 2), size=shape)
+    foreground_idx = (background_idx + offsets) % len(color_palette)
+    background_idx = background_idx.tolist()
+    foreground_idx = foreground_idx.tolist()
+    variants = rng.random(size=shape).tolist()
+    
     for i in range(num_rows):
         for j in range(num_cols):
-            generate_little_block(dwg, i, j, square_size, color_palette, block_styles)
-
-def generate_big_block(dwg, num_rows, num_cols, square_size, color_palette, block_styles, multiplier):
-    """Generate a big block."""
-    colors = get_two_colors(color_palette)
-    
-    # Convert block_styles to function map
-    style_map = {
-        'circle': draw_circle,
-        'opposite_circles': draw_opposite_circles,
-        'cross': draw_cross,
-        'half_square': draw_half_square,
-        'diagonal_square': draw_diagonal_square,
-        'quarter_circle': draw_quarter_circle,
-        # 'dots' is excluded for big blocks as mentioned in the article
-        'letter_block': draw_letter_block
-    }
-    
-    # Filter available styles based on user selection
-    available_styles = [style for style in block_styles if style in style_map and style != 'dots']
-    if not available_styles:
-        available_styles = list(style_map.keys())
-        if 'dots' in available_styles:
-            available_styles.remove('dots')
+            generate_little_block(svg, i, j, square_size, style_funcs[style_idx[i][j]],
+                                  color_palette[foreground_idx[i][j]], color_palette[background_idx[i][j]],
+                                  variants[i][j])
+    
+    # Grid blocks don't overlap, so their color groups can be written out together,
+    # ahead of anything drawn on top of the grid
+    svg.flush()
+
+def generate_big_block(svg, num_rows, num_cols, square_size, color_palette, block_styles, multiplier, rand=random):
+    """Generate a big block, making its choices with `rand` (default: the random module)."""
+    colors = get_two_colors(color_palette, rand)
+    
+    # 'dots' is excluded for big blocks as mentioned in the article
+    style_funcs = resolve_style_funcs(block_styles, exclude=('dots',))
     
     # Random position that doesn't overflow
-    x_pos = random.randint(0, num_rows - multiplier) * square_size
-    y_pos = random.randint(0, num_cols - multiplier) * square_size
+    x_pos = rand.randint(0, num_rows - multiplier) * square_size
+    y_pos = rand.randint(0, num_cols - multiplier) * square_size
     
     # Calculate the big square size
     big_square_size = multiplier * square_size
     
     # Select a random style
-    style_name = random.choice(available_styles)
-    style_func = style_map[style_name]
+    style_func = rand.choice(style_funcs)
     
     # Call the appropriate drawing function with the bigger size
-    style_func(dwg, x_pos, y_pos, big_square_size, colors["foreground"], colors["background"])
+    style_func(svg, x_pos, y_pos, big_square_size, colors["foreground"], colors["background"], rand.random())
+
+def create_art_grid(filename, rng, num_rows, num_cols, square_size, color_palette, block_styles,
+                    big_block_size=None, rand=random):
+    """
+    Build a complete art grid document: background, grid and an optional big block.
+    
+    Args:
+        filename: Output file path for SVGBuffer.save(), or None to only render
+        rng: numpy random Generator for the grid's choices
+        num_rows, num_cols: Grid dimensions
+        square_size: Size of each square
+        color_palette: List of hex colors
+        block_styles: List of available block styles
+        big_block_size: Size multiplier for the big block, or None for no big block
+        rand: random.Random for the big block's choices (default: the random module)
+    
+    Returns:
+        SVGBuffer holding the document
+    """
+    svg_width = num_rows * square_size
+    svg_height = num_cols * square_size
+    svg = SVGBuffer(filename, svg_width, svg_height, shape_rendering="crispEdges")
+    
+    # Add background
+    bg_colors = create_background_colors(color_palette)
+    
+    # Create a gradient for the background
+    svg.radial_gradient("background_gradient", [(0, bg_colors["bg_inner"]), (1, bg_colors["bg_outer"])])
+    
+    # Add a background rectangle with the gradient
+    svg.rect(0, 0, svg_width, svg_height, fill="url(#background_gradient)")
+    
+    # Generate grid
+    generate_grid(svg, rng, num_rows, num_cols, square_size, color_palette, block_styles)
+    
+    # Add big block on top of the grid
+    if big_block_size is not None:
+        generate_big_block(svg, num_rows, num_cols, square_size, color_palette, block_styles, big_block_size, rand)
+    
+    return svg
+
+def render_fast(seed, rows=6, cols=6, square_size=100, palette=None, big_block=True):
+    """
+    Render an art grid with all block styles straight to SVG bytes.
+    
+    Library entry point for batch or on-request generation: skips argument
+    parsing and file output, and reuses the palettes loaded by earlier calls.
+    All choices come from generators local to the call, so concurrent calls
+    don't disturb each other or the global `random` state.
+    
+    Args:
+        seed: Random seed for the whole document
+        rows, cols: Grid dimensions
+        square_size: Size of each square
+        palette: List of hex colors (default: a random downloaded palette)
+        big_block: Whether to add a big block, when the grid is large enough for one
+    
+    Returns:
+        The SVG document as UTF-8 bytes
+    """
+    rand = random.Random(seed)
+    rng = np.random.default_rng(seed)
+    
+    if palette is None:
+        palettes = load_color_palettes(None)
+        palette = palettes[rand.randint(0, len(palettes) - 1)]
+    
+    # Only offer big block sizes that fit inside the grid
+    big_block_sizes = [size for size in (2, 3) if size <= min(rows, cols)]
+    big_block_size = rand.choice(big_block_sizes) if big_block and big_block_sizes else None
+    svg = create_art_grid(None, rng, rows, cols, square_size, palette, tuple(STYLE_MAP), big_block_size,
+                          rand=rand)
+    return svg.render().encode('utf-8')
 
 def main():
     """Main function to run the SVG art grid generator."""
@@ -453,6 +614,7 @@ def main():
     # Set random seed if provided
     if args.seed is not None:
         random.seed(args.seed)
+    rng = np.random.default_rng(args.seed)
     
     # Determine rows and columns
     num_rows = args.rows if args.rows is not None else random.randint(4, 8)
@@ -471,39 +633,20 @@ def main():
     else:
         block_styles = all_styles
         
-    # Create SVG
-    svg_width = num_rows * square_size
-    svg_height = num_cols * square_size
-    dwg = svgwrite.Drawing(args.output, size=(f"{svg_width}px", f"{svg_height}px"), profile='full')
-    
-    # Add CSS for shape rendering
-    dwg.defs.add(dwg.style("svg * { shape-rendering: crispEdges; }"))
-    
-    # Add background
-    bg_colors = create_background_colors(color_palette)
-    
-    # Create a gradient for the background
-    gradient = dwg.defs.add(dwg.radialGradient(id="background_gradient"))
-    gradient.add_stop_color(0, bg_colors["bg_inner"])
-    gradient.add_stop_color(1, bg_colors["bg_outer"])
-    
-    # Add a background rectangle with the gradient
-    dwg.add(dwg.rect((0, 0), (svg_width, svg_height), fill="url(#background_gradient)"))
-    
-    # Generate grid
-    generate_grid(dwg, num_rows, num_cols, square_size, color_palette, block_styles)
-    
     # Add big block if enabled
+    big_block_size = None
     if args.big_block:
         big_block_size = args.big_block_size if args.big_block_size is not None else random.choice([2, 3])
-        generate_big_block(dwg, num_rows, num_cols, square_size, color_palette, block_styles, big_block_size)
+    
+    svg = create_art_grid(args.output, rng, num_rows, num_cols, square_size, color_palette, block_styles,
+                          big_block_size)
     
     # Save SVG
-    dwg.save()
+    svg.save()
     print(f"SVG saved to {args.output}")
     print(f"Generated a {num_rows}x{num_cols} grid with square size {square_size}px")
     print(f"Used color palette: {color_palette}")
-    if args.big_block:
+    if big_block_size is not None:
         print(f"Added a big block with multiplier {big_block_size}")
 
 if __name__ == "__main__":